@@ -1,12 +1,15 @@
 from europi import *
 import machine
 from time import ticks_diff, ticks_ms
-from random import uniform
+from random import getrandbits
 from europi_script import EuroPiScript
 from europi_config import EuroPiConfig
 import gc
 import math
 import framebuf
+import micropython
+from micropython import const
+from array import array
 
 """
 Egressus Melodiam (Stepped Melody)
@@ -35,7 +38,7 @@ self.cvPatternBanks[idx][self.CvPattern][step]
 
 cvPatternBank[idx] - Output: Each list item is a reference to an output
     [maxCvPatterns] - Cv Pattern Banks: Each list item is a reference to a CV Pattern
-        [maxStepLength] - Cv Patterns: Each list item is a CV value per clock step
+        [maxStepLength] - Cv Patterns: Each array('f') item is a CV value per clock step
 
 Slew / interpolation generator structures:
 
@@ -43,10 +46,14 @@ CV shapes are created using interpolation formulas that fill in the gaps between
 Each interpolation formula is generated by an associated slew shape function.
 There are both linear and non-linear interpolation functions that create various smooth and no-so-smooth shapes.
 
-Each slew shape function generates an array of values (samples) between two given points.
-Samples are output on the CV outputs based on the list of pre-computed interpolated values (sample buffers)
-A value from the sample buffer is retrieved using a Python generator function (self.slewGenerator()).
-One instance of the generator function for each each slew shape exists in a list: self.slewGeneratorObjects[]
+Each slew shape function writes an array of values (samples) between two given points into a sample buffer.
+Samples are whole millivolts in 16 bit integer buffers, which is finer than the DAC can output, so that they can be
+generated by viper code (which can't use floats) and take half the memory of float samples.
+Samples are output on the CV outputs based on the pre-computed interpolated values (sample buffers)
+Each output has its own pre-allocated sample buffer in self.slewBufferViews[], which the slew shapes write into.
+self.slewBuffers[] holds the samples each output is currently reading: either its pre-allocated buffer or, when a
+matching slew was generated recently, the cached samples themselves so they don't need to be copied.
+Samples are read directly using the current position in the buffer: self.slewBuffers[idx][self.slewBufferPosition[idx]]
 
 A new sample buffer (array of interpolated values) is created at each clock step.
 The number of samples required in each sample buffer (one for each output) is calculated at each clock step or if
@@ -58,10 +65,6 @@ Therefore, at the end of each clock step the algorithm tunes itself to work arou
 If there is a buffer underrun (not enough samples in the buffer), the previous output voltage (sample) is used until the algorithm
 catches back up with itself.
 
-slewGeneratorObjects[] contains 6 object (one for each output)
-Each slewGeneratorObjects[] object is a reference to a copy of the self.slewGenerator() function.
-The self.slewGenerator() function receives a buffer filled with samples and yields one sample each time it is called using next()
-
 In order to maintain the best balance of smooth waves and Rpi pico memory usage, an algorithm is used to vary the
 sample rate automatically based on the selected output division.
 This causes the sample rate to be at minium when there is a slow clock and high output division.
@@ -69,6 +72,9 @@ Conversely, when there is a fast clock and low output division a higher sample r
 often caused by under-samping a wave form.
 
 """
+# ticks_ms() wraps at 2^30, mask elapsed times to handle the wrap in viper code
+TICKS_MASK = const(0x3FFFFFFF)
+
 # Minimum allowed time between incoming 16th note clocks. Smaller values are too fast for poor ole micropython to keep up
 MIN_CLOCK_TIME_MS = 50
 
@@ -79,13 +85,46 @@ MAX_CLOCK_TIME_MS = 3750
 MAX_SAMPLE_RATE = 32
 MAX_OUTPUT_DENOMINATOR = 8
 
+# Pre-calculated numerator of the optimal sample rate calculation:
+# 2 * (MAX_SAMPLE_RATE / outputDivision) * (MAX_CLOCK_TIME_MS / msBetweenClocks)
+SAMPLE_RATE_NUMERATOR = 2 * MAX_SAMPLE_RATE * MAX_CLOCK_TIME_MS
+
 MIN_MS_BETWEEN_SAVES = 2000
 
+# Minimum time between screen updates (~30Hz) and knob reads (~50Hz), checking them on every pass of the
+# main loop steals time from outputting samples
+SCREEN_MIN_INTERVAL_MS = 33
+KNOB_MIN_INTERVAL_MS = 20
+
 # Calculate maximum sample buffer size required
 SLEW_BUFFER_SIZE_IN_SAMPLES = int(
     (MAX_CLOCK_TIME_MS / 1000) * MAX_SAMPLE_RATE * MAX_OUTPUT_DENOMINATOR
 )
 
+# Slew samples and output voltages are held as whole millivolts
+MV_PER_VOLT = const(1000)
+VOLTS_PER_MV = 1 / MV_PER_VOLT
+
+# Linear slews accumulate millivolts with 16 fractional bits so that rounding of the step size doesn't build up over
+# long slews
+LINEAR_FRAC_BITS = const(16)
+LINEAR_ONE = const(65536)
+LINEAR_HALF = const(32768)
+
+# The cosine slews look up one cycle of Q15 cosine values, indexed by the top bits of a 30 bit phase, where 2^30 is
+# a full cycle. The next 15 bits of the phase interpolate towards the next value.
+COS_LUT_SIZE = const(512)
+COS_ONE = const(32767)
+COS_HALF = const(16384)
+PHASE_MASK = const(0x3FFFFFFF)
+PHASE_CYCLE = 1073741824.0
+PHASE_INDEX_SHIFT = const(21)
+PHASE_INTERP_SHIFT = const(6)
+
+# Limits of the cache of previously generated slews. Patterns loop, so the same slews recur, but memory is tight
+SLEW_CACHE_MAX_ENTRIES = 32
+SLEW_CACHE_MAX_SAMPLES = SLEW_BUFFER_SIZE_IN_SAMPLES
+
 # Reduce knob hysteresis using this value - Mutable Instruments style
 KNOB_CHANGE_TOLERANCE = 0.999
 
@@ -93,8 +132,18 @@ KNOB_CHANGE_TOLERANCE = 0.999
 # Important: Needs firmware v0.12.1 or higher
 MAX_CV_VOLTAGE = europi_config.MAX_OUTPUT_VOLTAGE
 
+# Output indexes, iterating over a constant tuple avoids creating a range object on each pass
+OUTPUT_IDXS = (0, 1, 2, 3, 4, 5)
+
 MAX_STEP_LENGTH = 32
 
+# One dot per step, sliced to draw the pattern length
+PATTERN_LENGTH_DOTS = "." * MAX_STEP_LENGTH
+
+# Size of the area the pattern length rows are drawn in, 8 characters by 4 overlapping rows
+PATTERN_ROWS_WIDTH = 64
+PATTERN_ROWS_HEIGHT = 32
+
 # Diff between incoming clocks are stored in the FiFo buffer and averaged
 # Averaging over 5 values seems to deal with wonky clocks quite well
 CLOCK_DIFF_BUFFER_LEN = 5
@@ -103,8 +152,34 @@ CLOCK_DIFF_BUFFER_LEN = 5
 # Avoids wonky waves when wonky clocks are used.
 MIN_CLOCK_CHANGE_DETECTION_MS = 100
 
-# Slightly quicker way to get integers from boolean values
-BOOL_DICT = {False: 0, True: 1}
+
+def makeCosLut():
+    """Pre-compute one cycle of cos() as Q15 values for the cosine slew shapes
+
+    @return  COS_LUT_SIZE + 1 values, the last repeats the first so the last value can interpolate towards it
+    """
+    lut = array("i", bytes(4 * (COS_LUT_SIZE + 1)))
+    for i in range(COS_LUT_SIZE + 1):
+        lut[i] = round(math.cos(2 * math.pi * i / COS_LUT_SIZE) * COS_ONE)
+    return lut
+
+
+COS_LUT = makeCosLut()
+
+
+@micropython.viper
+def fillBuffer(buffer, value: int, start: int, end: int):
+    """Fill part of a sample buffer with a constant value
+
+    @param buffer  The memoryview of samples to fill
+    @param value   The value to fill with in millivolts
+    @param start   Index of the first sample to fill
+    @param end     Index after the last sample to fill
+    """
+    buf = ptr16(buffer)
+    for i in range(start, end):
+        buf[i] = value
+
 
 # Wave shape bit arrays
 WAVE_SHAPE_IMGS = [
@@ -132,6 +207,14 @@ WAVE_SHAPE_IMGS = [
     ),  # stepUpExpDown
 ]
 
+# New random pattern indicator, built once rather than on every redraw
+NEW_PATTERN_FB = framebuf.FrameBuffer(
+    bytearray(b"\x0f\x000\x80N`Q \x94\xa0\xaa\x90\xa9P\xa5@Z\x80H\x803\x00\x0c\x00"),
+    12,
+    12,
+    framebuf.MONO_HLSB,
+)
+
 
 class EgressusMelodiam(EuroPiScript):
     def __init__(self):
@@ -139,29 +222,25 @@ class EgressusMelodiam(EuroPiScript):
         # Initialize variables
         self.newClockToProcess = False
         self.clockStep = 0
-        self.stepPerOutput = [0, 0, 0, 0, 0, 0]
-        self.nextStepPerOutput = [0, 0, 0, 0, 0, 0]
+        self.stepPerOutput = array("i", [0, 0, 0, 0, 0, 0])
         self.CvPattern = 0
         self.resetTimeout = MAX_CLOCK_TIME_MS
         self.screenRefreshNeeded = True
+        self.garbageCollectNeeded = False
+        # Start the throttles from now, ticks_diff() against 0 goes negative once ticks_ms() passes half its range
+        self.lastScreenUpdate = ticks_ms()
+        self.lastKnobRead = self.lastScreenUpdate
         self.showNewPatternIndicator = False
         self.showNewPatternIndicatorClockStep = 0
 
         self.numCvPatterns = 1  # Leave at 1 due to memory limitations
         self.maxCvPatterns = 1  # Leave at 1 due to memory limitations
 
-        self.slewArray = []
         self.lastClockTime = 0
-        self.lastSlewVoltageOutputTime = [0, 0, 0, 0, 0, 0]
-        self.slewGeneratorObjects = [
-            self.slewGenerator([0]),
-            self.slewGenerator([0]),
-            self.slewGenerator([0]),
-            self.slewGenerator([0]),
-            self.slewGenerator([0]),
-            self.slewGenerator([0]),
-        ]
-        self.slewShapes = [
+        self.lastSlewVoltageOutputTime = array("i", [0, 0, 0, 0, 0, 0])
+        # Slew shape functions indexed by slew mode, the order must match WAVE_SHAPE_IMGS and saved slew modes
+        # A tuple of bound methods means selecting a shape is a single subscript
+        self.slewShapes = (
             self.stepUpStepDown,
             self.linspace,
             self.smooth,
@@ -170,16 +249,25 @@ class EgressusMelodiam(EuroPiScript):
             self.sharkToothReverse,
             self.logUpStepDown,
             self.stepUpExpDown,
-        ]
+        )
+        # Previously generated slews keyed by (slewMode, lfoMode, start mV, stop mV, num)
+        # slewCacheKeys holds the keys from least to most recently used
+        self.slewCache = {}
+        self.slewCacheKeys = []
+        self.slewCacheSamples = 0
         self.voltageExtremes = [0, MAX_CV_VOLTAGE]
-        self.outputVoltageFlipFlops = [
-            True,
-            True,
-            True,
-            True,
-            True,
-            True,
-        ]  # Flipflops between self.VoltageExtremes for LFO mode
+        # Flipflops between self.VoltageExtremes for LFO mode, one bit per output (bit 0 is output 1)
+        # Each bit is an index into self.voltageExtremes
+        self.outputVoltageFlipFlops = 0x3F
+
+        # Rendered pattern length rows, 8 characters wide, and the pattern length they were rendered for
+        self.patternRowsFb = framebuf.FrameBuffer(
+            bytearray(PATTERN_ROWS_WIDTH * PATTERN_ROWS_HEIGHT // 8),
+            PATTERN_ROWS_WIDTH,
+            PATTERN_ROWS_HEIGHT,
+            framebuf.MONO_HLSB,
+        )
+        self.patternRowsLength = -1
 
         self.selectedOutput = 0
         self.lastK1Reading = 0
@@ -188,20 +276,26 @@ class EgressusMelodiam(EuroPiScript):
         self.currentK2Reading = 0
 
         self.running = False
-        self.bufferUnderrunCounter = [0, 0, 0, 0, 0, 0]
-        self.bufferOverrunSamples = [0, 0, 0, 0, 0, 0]
-        self.samplesPerSec = [0, 0, 0, 0, 0, 0]
-        self.msBetweenSamples = [0, 0, 0, 0, 0, 0]
+        self.bufferUnderrunCounter = array("i", [0, 0, 0, 0, 0, 0])
+        self.bufferOverrunSamples = array("i", [0, 0, 0, 0, 0, 0])
+        self.samplesPerSec = array("i", [0, 0, 0, 0, 0, 0])
+        self.msBetweenSamples = array("i", [0, 0, 0, 0, 0, 0])
 
         self.unClockedMode = False
         self.lastClockTime = ticks_ms()
         self.lastSaveState = ticks_ms()
         self.pendingSaveState = False
-        self.previousOutputVoltage = [0, 0, 0, 0, 0, 0]
-        self.slewBufferSampleNum = [0, 0, 0, 0, 0, 0]
-        self.slewBufferPosition = [0, 0, 0, 0, 0, 0]
-        self.bufferSampleOffsets = [0, 0, 0, 0, 0, 0]
-        self.squareOutputs = [0, 0, 0, 0, 0, 0]
+        # Output voltages are held as millivolts, see MV_PER_VOLT
+        self.previousOutputVoltage = array("i", [0, 0, 0, 0, 0, 0])
+        # The voltage last written to each output, -1 forces the next sample to be written
+        self.lastWrittenVoltage = array("i", [-1, -1, -1, -1, -1, -1])
+        self.slewBufferSampleNum = array("i", [0, 0, 0, 0, 0, 0])
+        self.slewBufferPosition = array("i", [0, 0, 0, 0, 0, 0])
+        self.bufferSampleOffsets = array("i", [0, 0, 0, 0, 0, 0])
+        self.squareOutputs = array("i", [0, 0, 0, 0, 0, 0])
+
+        # Bound output functions, cached to avoid attribute lookups when outputting samples
+        self.outputVoltageFns = tuple(cv.voltage for cv in cvs)
 
         self.loadState()
         # pre-create slew buffers to avoid memory allocation errors
@@ -213,7 +307,9 @@ class EgressusMelodiam(EuroPiScript):
         # Init clock diff buffer with the default or saved value
         for n in range(CLOCK_DIFF_BUFFER_LEN):
             self.inputClockDiffs.append(self.msBetweenClocks)
-        self.averageMsBetweenClocks = self.average(self.inputClockDiffs)
+        # Running total of inputClockDiffs, updated as values are replaced so averaging is cheap
+        self.clockDiffSum = sum(self.inputClockDiffs)
+        self.averageMsBetweenClocks = self.clockDiffSum // CLOCK_DIFF_BUFFER_LEN
 
         # Clock rate or output division changed, recalculate optimal sample rate
         self.calculateOptimalSampleRate()
@@ -283,28 +379,30 @@ class EgressusMelodiam(EuroPiScript):
 
     def calculateOptimalSampleRate(self):
         """Calculate optimal sample rate for smooth CV output while using minimal memory"""
-        for idx in range(len(cvs)):
-            self.samplesPerSec[idx] = int(
-                min(2 *
-                    (MAX_SAMPLE_RATE / self.outputDivisions[idx])
-                    * (MAX_CLOCK_TIME_MS / self.averageMsBetweenClocks),
-                    MAX_SAMPLE_RATE,
-                )
+        # Integer maths only, the pico has no FPU
+        msBetweenClocks = max(1, int(self.averageMsBetweenClocks))
+        for idx in OUTPUT_IDXS:
+            samplesPerSec = min(
+                MAX_SAMPLE_RATE,
+                SAMPLE_RATE_NUMERATOR // (self.outputDivisions[idx] * msBetweenClocks),
             )
-            self.msBetweenSamples[idx] = int(1000 / self.samplesPerSec[idx])
+            self.samplesPerSec[idx] = samplesPerSec
+            self.msBetweenSamples[idx] = 1000 // samplesPerSec
 
     def initSlewBuffers(self):
-        """Create slew buffers and fill with zeros"""
-        self.slewBuffers = []
-        for n in range(6):  # for each output 0-5
-            self.slewBuffers.append([])  # add new empty list to the buffer list
-            for m in range(SLEW_BUFFER_SIZE_IN_SAMPLES):
-                self.slewBuffers[n].append(0)
+        """Create slew buffers and fill with zeros
 
-    def average(self, list):
-        """Pythonic mean average function"""
-        myList = list.copy()
-        return sum(myList) / len(myList)
+        The buffers are views into one contiguous allocation, which is kinder to the heap than six separate ones
+        """
+        self.slewBufferBacking = array("h", bytes(2 * 6 * SLEW_BUFFER_SIZE_IN_SAMPLES))
+        backing = memoryview(self.slewBufferBacking)
+        self.slewBufferViews = []
+        for n in range(6):  # for each output 0-5
+            self.slewBufferViews.append(
+                backing[n * SLEW_BUFFER_SIZE_IN_SAMPLES : (n + 1) * SLEW_BUFFER_SIZE_IN_SAMPLES]
+            )
+        # The samples being output, see generateSlew()
+        self.slewBuffers = list(self.slewBufferViews)
 
     def initCvPatternBanks(self):
         """Initialize CV pattern banks"""
@@ -325,7 +423,6 @@ class EgressusMelodiam(EuroPiScript):
         # Note: This function is capable of working with multiple pattern banks
         #  However, due to current memory limitations only one pattern bank is used
         try:
-            gc.collect()
             if new:
                 # new flag provided, create new list
                 if activePatternOnly:
@@ -348,6 +445,8 @@ class EgressusMelodiam(EuroPiScript):
                         pattern[self.CvPattern] = self.generateRandomPattern(
                             MAX_STEP_LENGTH, 0, MAX_CV_VOLTAGE
                         )
+            # The replaced patterns are garbage, collect it with the next screen update
+            self.garbageCollectNeeded = True
             return True
         except Exception:
             return False
@@ -361,29 +460,46 @@ class EgressusMelodiam(EuroPiScript):
 
         @return  The generated pattern
         """
-        self.t = []
+        # Scale 16 random bits into the required range, quicker than uniform() and finer than the outputs can resolve
+        scale = (max - min) / 65535
+        self.t = array("f", bytes(4 * length))
         for i in range(0, length):
-            self.t.append(round(uniform(min, max), 3))
+            self.t[i] = min + getrandbits(16) * scale
         return self.t
 
     def main(self):
         """Entry point - main loop. See inline comments for more info"""
+        # Local references are quicker to look up than globals and attributes
+        ticksMs = ticks_ms
+        ticksDiff = ticks_diff
+        outputSamples = self.outputSamples
+
         while True:
-            self.updateScreen()
-            self.getK1Value()
-            self.getOutputDivision()
+            now = ticksMs()
+
+            # Throttle screen updates and knob reads
+            if self.screenRefreshNeeded and ticksDiff(now, self.lastScreenUpdate) >= SCREEN_MIN_INTERVAL_MS:
+                # Updating the screen already causes latency, so collect any garbage from a new pattern then
+                if self.garbageCollectNeeded:
+                    gc.collect()
+                    self.garbageCollectNeeded = False
+                self.updateScreen()
+                self.lastScreenUpdate = now
+            if ticksDiff(now, self.lastKnobRead) >= KNOB_MIN_INTERVAL_MS:
+                self.pollKnobs()
+                self.lastKnobRead = now
 
             if self.newClockToProcess:
 
                 # Get the time difference since the last clockTime
-                newDiffBetweenClocks = min(MAX_CLOCK_TIME_MS, ticks_ms() - self.lastClockTime)
-                self.lastClockTime = ticks_ms()
+                newDiffBetweenClocks = min(MAX_CLOCK_TIME_MS, now - self.lastClockTime)
+                self.lastClockTime = now
 
                 # Add time diff between clocks to inputClockDiffs Fifo list, skipping the first clock as we have no reference
                 if self.clockStep > 0:
-                    self.inputClockDiffs[self.clockStep % CLOCK_DIFF_BUFFER_LEN] = (
-                        newDiffBetweenClocks
-                    )
+                    diffIdx = self.clockStep % CLOCK_DIFF_BUFFER_LEN
+                    self.clockDiffSum += newDiffBetweenClocks - self.inputClockDiffs[diffIdx]
+                    self.inputClockDiffs[diffIdx] = newDiffBetweenClocks
 
                 # Clock rate change detection
                 if (
@@ -392,7 +508,7 @@ class EgressusMelodiam(EuroPiScript):
                     > MIN_CLOCK_CHANGE_DETECTION_MS
                 ):
                     # Update average ms between clocks
-                    self.averageMsBetweenClocks = self.average(self.inputClockDiffs)
+                    self.averageMsBetweenClocks = self.clockDiffSum // CLOCK_DIFF_BUFFER_LEN
                     # Clock rate or output division changed, recalculate optimal sample rate
                     self.calculateOptimalSampleRate()
 
@@ -402,55 +518,21 @@ class EgressusMelodiam(EuroPiScript):
                 self.newClockToProcess = False
 
             # Cycle through outputs, process when needed
-            for idx in range(len(cvs)):
-                if (
-                    ticks_diff(ticks_ms(), self.lastSlewVoltageOutputTime[idx])
-                    >= self.msBetweenSamples[idx]
-                    and self.running
-                ):
-
-                    try:
-
-                        # Do we have a sample in the buffer?
-                        if self.slewBufferPosition[idx] < self.slewBufferSampleNum[idx]:
-                            # Yes, we have a sample, output voltage to match the sample, reset underrun counter and advance position in buffer
-
-                            # If a square interpolation mode (0) a precalculated value is used
-                            # as the generator function for square waves was really buggy
-                            if self.outputSlewModes[idx] == 0:
-                                v = self.squareOutputs[idx]
-                            else:
-                                v = next(self.slewGeneratorObjects[idx])
-                            cvs[idx].voltage(v)
-                            self.previousOutputVoltage[idx] = v
-                            self.bufferUnderrunCounter[idx] = 0
-                        else:
-                            # We do not have a sample - buffer under run
-                            # Output the previous voltage to keep things as smooth as possible
-                            cvs[idx].voltage(self.previousOutputVoltage[idx])
-                            self.bufferUnderrunCounter[idx] += 1
-
-                        # Advance the position in the sample/slew buffer
-                        self.slewBufferPosition[idx] += 1
-
-                        # Update the last sample output time
-                        self.lastSlewVoltageOutputTime[idx] = ticks_ms()
-
-                    except StopIteration:
-                        continue
+            if self.running:
+                outputSamples(now)
 
             # Save state
-            if self.pendingSaveState and ticks_diff(ticks_ms(), self.lastSaveState) >= MIN_MS_BETWEEN_SAVES:
+            if self.pendingSaveState and ticksDiff(now, self.lastSaveState) >= MIN_MS_BETWEEN_SAVES:
                 self.saveState()
                 self.pendingSaveState = False
 
             # If we are not being clocked, trigger a clock after the configured clock time
             if (
                 self.unClockedMode
-                and ticks_diff(ticks_ms(), self.lastClockTime) >= self.averageMsBetweenClocks
+                and ticksDiff(now, self.lastClockTime) >= self.averageMsBetweenClocks
             ):
                 self.running = True
-                self.lastClockTime = ticks_ms()
+                self.lastClockTime = now
                 self.handleClockStep()
                 self.clockStep += 1
 
@@ -458,10 +540,15 @@ class EgressusMelodiam(EuroPiScript):
             if (
                 not self.unClockedMode
                 and self.clockStep != 0
-                and ticks_diff(ticks_ms(), din.last_triggered()) > self.resetTimeout
+                and ticksDiff(now, din.last_triggered()) > self.resetTimeout
             ):
-                for idx in range(len(cvs)):
+                for idx in OUTPUT_IDXS:
                     self.stepPerOutput[idx] = 0
+                    self.slewBufferPosition[idx] = 0
+                    self.bufferUnderrunCounter[idx] = 0
+                    self.bufferOverrunSamples[idx] = 0
+                    self.bufferSampleOffsets[idx] = 0
+                    self.lastWrittenVoltage[idx] = -1
                 # Update screen with the upcoming CV pattern
                 self.screenRefreshNeeded = True
                 self.pendingSaveState = True
@@ -470,96 +557,215 @@ class EgressusMelodiam(EuroPiScript):
                 for cv in cvs:
                     cv.off()
 
-                self.bufferUnderrunCounter = [0, 0, 0, 0, 0, 0]
-                self.bufferOverrunSamples = [0, 0, 0, 0, 0, 0]
-                self.slewBufferPosition = [0, 0, 0, 0, 0, 0]
-                self.bufferSampleOffsets = [0, 0, 0, 0, 0, 0]
+    @micropython.viper
+    def outputSamples(self, now: int):
+        """Output the next sample on each output that is due one
+
+        @param now  The current time in ms, as returned by ticks_ms()
+        """
+        lastOutputTimes = ptr32(self.lastSlewVoltageOutputTime)
+        msBetweenSamples = ptr32(self.msBetweenSamples)
+        positions = ptr32(self.slewBufferPosition)
+        sampleNums = ptr32(self.slewBufferSampleNum)
+        slewModes = ptr32(self.outputSlewModes)
+        squareOutputs = self.squareOutputs
+        previousOutputVoltage = self.previousOutputVoltage
+        previousMv = ptr32(self.previousOutputVoltage)
+        lastWrittenMv = ptr32(self.lastWrittenVoltage)
+        bufferUnderrunCounter = ptr32(self.bufferUnderrunCounter)
+        outputVoltageFns = self.outputVoltageFns
+        slewBuffers = self.slewBuffers
+
+        for idx in range(6):
+            if ((now - lastOutputTimes[idx]) & TICKS_MASK) < msBetweenSamples[idx]:
+                continue
+
+            # Do we have a sample in the buffer?
+            if positions[idx] < sampleNums[idx]:
+                # Yes, we have a sample, output voltage to match the sample, reset underrun counter and advance position in buffer
+
+                # If a square interpolation mode (0) a precalculated value is used
+                # as the generator function for square waves was really buggy
+                if slewModes[idx] == 0:
+                    v = squareOutputs[idx]
+                else:
+                    v = slewBuffers[idx][positions[idx]]
+                mv = int(v)
+                previousMv[idx] = mv
+                bufferUnderrunCounter[idx] = 0
+            else:
+                # We do not have a sample - buffer under run
+                # Output the previous voltage to keep things as smooth as possible
+                v = previousOutputVoltage[idx]
+                mv = int(v)
+                bufferUnderrunCounter[idx] += 1
+
+            # Only write to the output if the voltage has changed, only then is it converted to volts
+            if mv != lastWrittenMv[idx]:
+                outputVoltageFns[idx](v * VOLTS_PER_MV)
+                lastWrittenMv[idx] = mv
+
+            # Advance the position in the sample/slew buffer
+            positions[idx] += 1
+
+            # Update the last sample output time
+            lastOutputTimes[idx] = now
 
     def handleClockStep(self):
         """Advances step and generates new slew voltages to next value in CV pattern"""
 
+        # Local references to values used for every output
+        clockStep = self.clockStep
+        patternLength = self.patternLength
+        secsBetweenClocks = self.averageMsBetweenClocks / 1000
+        catchOverruns = clockStep > CLOCK_DIFF_BUFFER_LEN and not self.unClockedMode
+        outputDivisions = self.outputDivisions
+        outputSlewModes = self.outputSlewModes
+        stepPerOutput = self.stepPerOutput
+        bufferSampleOffsets = self.bufferSampleOffsets
+        slewBuffers = self.slewBuffers
+        slewBufferViews = self.slewBufferViews
+
         # Cycle through outputs and generate slew for each
-        for idx in range(len(cvs)):
+        for idx in OUTPUT_IDXS:
+            division = outputDivisions[idx]
 
             # If the clockstep is a division of the output division
-            if self.clockStep % (self.outputDivisions[idx]) == 0:
+            if clockStep % division == 0:
                 # flip the flip flop value for LFO mode
-
-                self.outputVoltageFlipFlops[idx] = not self.outputVoltageFlipFlops[idx]
+                self.outputVoltageFlipFlops ^= 1 << idx
 
                 # Catch buffer over-runs by detecting that not all samples were used in the last cycle
-                if self.clockStep > CLOCK_DIFF_BUFFER_LEN and not self.unClockedMode:
-                    self.bufferOverrunSamples[idx] = int(
-                        self.slewBufferPosition[idx] - self.slewBufferSampleNum[idx]
-                    )
-
-                    self.bufferSampleOffsets[idx] = (
-                        self.bufferSampleOffsets[idx] - self.bufferOverrunSamples[idx]
-                    )
-
+                if catchOverruns:
+                    overrunSamples = self.slewBufferPosition[idx] - self.slewBufferSampleNum[idx]
+                    self.bufferOverrunSamples[idx] = overrunSamples
+                    sampleOffset = bufferSampleOffsets[idx] - overrunSamples
                 else:
-                    self.bufferSampleOffsets[idx] = 0
+                    sampleOffset = 0
+                bufferSampleOffsets[idx] = sampleOffset
 
                 # Set the target number of samples for the next cycle, factoring in any previous overruns
                 # Calculate the number of samples needed until the next clock
-                self.slewBufferSampleNum[idx] = min(
+                sampleNum = min(
                     SLEW_BUFFER_SIZE_IN_SAMPLES,
-                    int(
-                        (
-                            (self.averageMsBetweenClocks / 1000)
-                            * self.outputDivisions[idx]
-                            * self.samplesPerSec[idx]
-                        )
-                        - self.bufferSampleOffsets[idx]
-                    ),
+                    int((secsBetweenClocks * division * self.samplesPerSec[idx]) - sampleOffset),
                 )
+                self.slewBufferSampleNum[idx] = sampleNum
+
+                slewMode = outputSlewModes[idx]
+                step = stepPerOutput[idx]
+
+                # Read from the output's own buffer unless generateSlew() finds the slew in the cache
+                slewBuffers[idx] = slewBufferViews[idx]
 
                 # If length is one, cycle between high and low voltages (traditional LFO)
                 # Each output uses a its configured slew shape
-                if self.patternLength == 1:
+                if patternLength == 1:
+                    flipFlop = (self.outputVoltageFlipFlops >> idx) & 1
 
                     # If square transition, set next output value to be one of the voltage extremes (flipping each time)
-                    if self.outputSlewModes[idx] == 0:
-                        self.squareOutputs[idx] = self.voltageExtremes[
-                            BOOL_DICT[self.outputVoltageFlipFlops[idx]]
-                        ]
+                    if slewMode == 0:
+                        self.squareOutputs[idx] = round(self.voltageExtremes[flipFlop] * MV_PER_VOLT)
                     else:
-                        self.slewArray = self.slewShapes[self.outputSlewModes[idx]](
-                            self.voltageExtremes[BOOL_DICT[self.outputVoltageFlipFlops[idx]]],
-                            self.voltageExtremes[BOOL_DICT[not self.outputVoltageFlipFlops[idx]]],
-                            self.slewBufferSampleNum[idx],
-                            self.slewBuffers[idx],
+                        self.generateSlew(
+                            slewMode,
+                            self.voltageExtremes[flipFlop],
+                            self.voltageExtremes[1 - flipFlop],
+                            sampleNum,
+                            idx,
                         )
                 else:
+                    pattern = self.cvPatternBanks[idx][self.CvPattern]
+
                     # If square transition, just output the CV value in the pattern associated with the current step
-                    if self.outputSlewModes[idx] == 0:
-                        self.squareOutputs[idx] = self.cvPatternBanks[idx][self.CvPattern][
-                            self.stepPerOutput[idx]
-                        ]
+                    if slewMode == 0:
+                        self.squareOutputs[idx] = round(pattern[step] * MV_PER_VOLT)
                     else:
-                        self.slewArray = self.slewShapes[self.outputSlewModes[idx]](
-                            self.cvPatternBanks[idx][self.CvPattern][self.stepPerOutput[idx]],
-                            self.cvPatternBanks[idx][self.CvPattern][self.nextStepPerOutput[idx]],
-                            self.slewBufferSampleNum[idx],
-                            self.slewBuffers[idx],
+                        # Slew towards the value of the next step, wrapping at the end of the pattern
+                        nextStep = step + 1
+                        if nextStep >= patternLength:
+                            nextStep = 0
+                        self.generateSlew(
+                            slewMode,
+                            pattern[step],
+                            pattern[nextStep],
+                            sampleNum,
+                            idx,
                         )
 
-                # Update the function object reference to the generator function, passing it the latest slewArray sample buffer
-                self.slewGeneratorObjects[idx] = self.slewGenerator(self.slewArray)
-
                 # Go back to the start of the buffer
                 self.slewBufferPosition[idx] = 0
 
-                # Calculate next steps (indexs in CV patterns)
-                self.stepPerOutput[idx] = ((self.stepPerOutput[idx] + 1)) % self.patternLength
-                self.nextStepPerOutput[idx] = ((self.stepPerOutput[idx] + 1)) % self.patternLength
+                # Calculate next step (index in CV patterns)
+                stepPerOutput[idx] = (step + 1) % patternLength
 
         # Hide the shreaded visual indicator after 2 clock steps
-        if self.clockStep > self.showNewPatternIndicatorClockStep + 2:
+        if self.showNewPatternIndicator and self.clockStep > self.showNewPatternIndicatorClockStep + 2:
             self.showNewPatternIndicator = False
+            self.screenRefreshNeeded = True
+
+    def generateSlew(self, slewMode, start, stop, num, idx):
+        """Set the samples an output reads using a slew shape, re-using a previously generated slew if one matches
 
-    def getK1Value(self):
-        """Get the k1 value, update params if changed"""
+        A matching slew is output straight from the cache, otherwise the slew shape fills the output's own buffer
+
+        Start and stop voltages are converted to the nearest millivolt once here, which is finer than the DAC can
+        output, so that matching slews can be found and the slew shapes can work in integer millivolts
+
+        @param slewMode  Index of the slew shape in self.slewShapes
+        @param start     Starting voltage
+        @param stop      Target voltage
+        @param num       Number of samples required
+        @param idx       The output index
+        """
+        start = round(start * MV_PER_VOLT)
+        stop = round(stop * MV_PER_VOLT)
+        key = (slewMode, self.patternLength == 1, start, stop, num)
+        cache = self.slewCache
+        keys = self.slewCacheKeys
+        cached = cache.get(key)
+        if cached is not None:
+            self.slewBuffers[idx] = cached
+            # Mark as most recently used
+            keys.remove(key)
+            keys.append(key)
+            return
+
+        buffer = self.slewBufferViews[idx]
+        self.slewBuffers[idx] = buffer
+        self.slewShapes[slewMode](start, stop, num, buffer)
+
+        if num < 1 or num > SLEW_CACHE_MAX_SAMPLES:
+            return
+        # Evict the least recently used slews to make room, keeping the smallest evicted array that can hold
+        # the new slew so it can be re-used rather than allocating a new array in the clock handler
+        spare = None
+        while keys and (
+            len(keys) >= SLEW_CACHE_MAX_ENTRIES
+            or self.slewCacheSamples + num > SLEW_CACHE_MAX_SAMPLES
+        ):
+            evicted = cache.pop(keys.pop(0))
+            self.slewCacheSamples -= len(evicted)
+            if len(evicted) < num or (spare is not None and len(evicted) >= len(spare)):
+                continue
+            # An output may still be reading the evicted samples
+            for slewBuffer in self.slewBuffers:
+                if slewBuffer is evicted:
+                    break
+            else:
+                spare = evicted
+        if spare is None:
+            spare = array("h", buffer[:num])
+        else:
+            memoryview(spare)[:num] = buffer[:num]
+        cache[key] = spare
+        keys.append(key)
+        self.slewCacheSamples += len(spare)
+
+    def pollKnobs(self):
+        """Get the k1 and k2 values, update params if changed"""
+        changed = False
+        sampleRateChanged = False
 
         self.currentK1Reading = k1.read_position(100) + 1
 
@@ -570,55 +776,57 @@ class EgressusMelodiam(EuroPiScript):
                 self.averageMsBetweenClocks = (
                     self.currentK1Reading * (MAX_CLOCK_TIME_MS / MIN_CLOCK_TIME_MS) / 2
                 )
-
-                # clock rate or output division changed, calculate optimal sample rate
-                self.calculateOptimalSampleRate()
+                sampleRateChanged = True
 
             else:
                 # Set pattern length
                 self.patternLength = int((MAX_STEP_LENGTH / 100) * (self.currentK1Reading - 1)) + 1
 
-            # Something changed, update screen and save state
-            self.pendingSaveState = True
-            #self.saveState()
-            self.screenRefreshNeeded = True
+            changed = True
 
         self.lastK1Reading = self.currentK1Reading
 
-    def getOutputDivision(self):
-        """Get the output division from k2"""
+        # Get the output division from k2
         self.currentK2Reading = k2.read_position(MAX_OUTPUT_DENOMINATOR) + 1
 
         if self.currentK2Reading != self.lastK2Reading:
-            self.outputDivisions[self.selectedOutput] = k2.read_position(MAX_OUTPUT_DENOMINATOR) + 1
-            self.screenRefreshNeeded = True
+            self.outputDivisions[self.selectedOutput] = self.currentK2Reading
             self.lastK2Reading = self.currentK2Reading
+            sampleRateChanged = True
+            changed = True
+
+        if sampleRateChanged:
             # clock rate or output division changed, calculate optimal sample rate
             self.calculateOptimalSampleRate()
+
+        if changed:
+            # Something changed, update screen and save state
             self.pendingSaveState = True
-            #self.saveState()
+            self.screenRefreshNeeded = True
 
     def saveState(self):
         """Save working vars to a save state file"""
-        self.state = {
-            "cvPatternBanks": self.cvPatternBanks,
-            "CvPattern": self.CvPattern,
-            "outputSlewModes": self.outputSlewModes,
-            "outputDivisions": self.outputDivisions,
-            "patternLength": self.patternLength,
-            "msBetweenClocks": self.msBetweenClocks,
-            "unClockedMode": self.unClockedMode,
-        }
-        self.save_state_json(self.state)
+        # Update the state loaded by loadState() in place rather than allocating a new dict on each save
+        state = self.state
+        state["cvPatternBanks"] = [[list(pattern) for pattern in bank] for bank in self.cvPatternBanks]
+        state["CvPattern"] = self.CvPattern
+        state["outputSlewModes"] = list(self.outputSlewModes)
+        state["outputDivisions"] = list(self.outputDivisions)
+        state["patternLength"] = self.patternLength
+        state["msBetweenClocks"] = self.msBetweenClocks
+        state["unClockedMode"] = self.unClockedMode
+        self.save_state_json(state)
         self.lastSaveState = ticks_ms()
 
     def loadState(self):
         """Load a previously saved state, or initialize working vars, then save"""
         self.state = self.load_state_json()
-        self.cvPatternBanks = self.state.get("cvPatternBanks", [])
+        self.cvPatternBanks = [
+            [array("f", pattern) for pattern in bank] for bank in self.state.get("cvPatternBanks", [])
+        ]
         self.CvPattern = self.state.get("CvPattern", 0)
-        self.outputSlewModes = self.state.get("outputSlewModes", [0, 0, 0, 0, 0, 0])
-        self.outputDivisions = self.state.get("outputDivisions", [1, 2, 4, 1, 2, 4])
+        self.outputSlewModes = array("i", self.state.get("outputSlewModes", [0, 0, 0, 0, 0, 0]))
+        self.outputDivisions = array("i", self.state.get("outputDivisions", [1, 2, 4, 1, 2, 4]))
         self.patternLength = self.state.get("patternLength", 8)
         self.msBetweenClocks = self.state.get("msBetweenClocks", 976)
         self.unClockedMode = self.state.get("unClockedMode", False)
@@ -666,50 +874,33 @@ class EgressusMelodiam(EuroPiScript):
 
         else:
 
-            # Draw pattern length
-            row1 = ""
-            row2 = ""
-            row3 = ""
-            row4 = ""
-            if self.patternLength > 24:
-                # draw two rows
-                row1 = "........"
-                row2 = "........"
-                row3 = "........"
-                for i in range(24, self.patternLength):
-                    row4 = row4 + "."
-            elif self.patternLength > 16:
-                row1 = "........"
-                row2 = "........"
-                for i in range(16, self.patternLength):
-                    row3 = row3 + "."
-            elif self.patternLength > 8:
-                row1 = "........"
-                for i in range(8, self.patternLength):
-                    row2 = row2 + "."
-            else:
-                # draw one row
-                for i in range(self.patternLength):
-                    row1 = row1 + "."
-
-            xStart = 27
-            oled.text(row1, xStart, 0, 1)
-            oled.text(row2, xStart, 6, 1)
-            oled.text(row3, xStart, 12, 1)
-            oled.text(row4, xStart, 18, 1)
+            # Draw pattern length, 8 steps per row
+            patternLength = self.patternLength
+            fb = self.patternRowsFb
+            # Only render the rows again if the pattern length has changed, otherwise re-use the last render
+            if patternLength != self.patternRowsLength:
+                row1 = PATTERN_LENGTH_DOTS[: min(8, patternLength)]
+                row2 = PATTERN_LENGTH_DOTS[: max(0, min(8, patternLength - 8))]
+                row3 = PATTERN_LENGTH_DOTS[: max(0, min(8, patternLength - 16))]
+                row4 = PATTERN_LENGTH_DOTS[: max(0, min(8, patternLength - 24))]
+
+                fb.fill(0)
+                fb.text(row1, 0, 0, 1)
+                fb.text(row2, 0, 6, 1)
+                fb.text(row3, 0, 12, 1)
+                fb.text(row4, 0, 18, 1)
+                self.patternRowsLength = patternLength
+
+            # Unlit pixels are transparent (key 0) so the blit doesn't clear anything already drawn beneath it
+            oled.blit(fb, 27, 0, 0)
 
         # Draw a visual cue for when a long button press has been detected
         # and a new random pattern is being generated
         if self.showNewPatternIndicator:
-            fb = framebuf.FrameBuffer(
-                bytearray(b"\x0f\x000\x80N`Q \x94\xa0\xaa\x90\xa9P\xa5@Z\x80H\x803\x00\x0c\x00"),
-                12,
-                12,
-                framebuf.MONO_HLSB,
-            )
-            oled.blit(fb, 0, 0)
+            oled.blit(NEW_PATTERN_FB, 0, 0)
 
         oled.show()
+        self.screenRefreshNeeded = False
 
     # -----------------------------
     # Slew functions
@@ -718,254 +909,209 @@ class EgressusMelodiam(EuroPiScript):
     def stepUpStepDown(self, start, stop, num, buffer):
         """Produces step up, step down
 
-        @param start  Starting value
-        @param stop   Target value
+        @param start  Starting value in millivolts
+        @param stop   Target value in millivolts
         @param num    Number of samples required
         @param buffer Pointer to fill with samples
-
-        @return  The edited buffer
         """
-        c = 0
+        # Step shapes are one or two constant fills, every sample is written so that slews can be cached
         if self.patternLength == 1:  # LFO Mode, make sure we complete a full cycle
-            for i in range(num / 2):
-                buffer[c] = start
-                c += 1
-            for i in range(num / 2):
-                buffer[c] = stop
-                c += 1
+            half = num // 2
+            fillBuffer(buffer, start, 0, half)
+            fillBuffer(buffer, stop, half, num)
         else:
-            for i in range(num - 1):
-                buffer[c] = stop
-                c += 1
-        return buffer
+            fillBuffer(buffer, stop, 0, num)
 
     def linspace(self, start, stop, num, buffer):
         """Produces a linear transition
 
-        @param start  Starting value
-        @param stop   Target value
+        @param start  Starting value in millivolts
+        @param stop   Target value in millivolts
         @param num    Number of samples required
         @param buffer Pointer to fill with samples
-
-        @return  The edited buffer
         """
-        c = 0
         num = max(1, num)  # avoid divide by zero
-        diff = (float(stop) - start) / (num)
+        # Starting half a millivolt up rounds each sample to the nearest millivolt
+        self.fillLinear(
+            buffer,
+            num,
+            (start << LINEAR_FRAC_BITS) + LINEAR_HALF,
+            ((stop - start) << LINEAR_FRAC_BITS) // num,
+        )
+
+    @micropython.viper
+    def fillLinear(self, buffer, num: int, val: int, diff: int):
+        """Fill a sample buffer with a line, stepping the value by diff each sample
+
+        @param buffer Pointer to fill with samples
+        @param num    Number of samples required
+        @param val    Starting value in millivolts with LINEAR_FRAC_BITS fractional bits
+        @param diff   Difference between samples in millivolts with LINEAR_FRAC_BITS fractional bits
+        """
+        buf = ptr16(buffer)
         for i in range(num):
-            val = (diff * i) + start
-            buffer[c] = val
-            c += 1
-        return buffer
+            buf[i] = val >> LINEAR_FRAC_BITS
+            val += diff
 
     def logUpStepDown(self, start, stop, num, buffer):
         """Produces a log up/step down transition
 
-        @param start  Starting value
-        @param stop   Target value
+        @param start  Starting value in millivolts
+        @param stop   Target value in millivolts
         @param num    Number of samples required
         @param buffer Pointer to fill with samples
-
-        @return  The edited buffer
         """
-        c = 0
         if self.patternLength == 1:  # LFO Mode, make sure we complete a full cycle
-            for i in range(num / 2):
-                i = max(i, 1)
-                x = 1 - ((stop - float(start)) / (i)) + (stop - 1)
-                buffer[c] = x
-                c += 1
-            for i in range(num / 2):
-                buffer[c] = stop
-                c += 1
+            half = num // 2
+            self.fillReciprocal(buffer, half, stop, stop - start)
+            fillBuffer(buffer, stop, half, num)
         else:
             if stop >= start:
-                for i in range(num):
-                    i = max(i, 1)
-                    x = 1 - ((stop - float(start)) / (i)) + (stop - 1)
-                    buffer[c] = x
-                    c += 1
+                self.fillReciprocal(buffer, num, stop, stop - start)
             else:
-                for i in range(num):
-                    buffer[c] = stop
-                    c += 1
-        return buffer
+                fillBuffer(buffer, stop, 0, num)
 
     def stepUpExpDown(self, start, stop, num, buffer):
         """Produces a step up, exponential down transition
 
-        @param start  Starting value
-        @param stop   Target value
+        @param start  Starting value in millivolts
+        @param stop   Target value in millivolts
         @param num    Number of samples required
         @param buffer Pointer to fill with samples
-
-        @return  The edited buffer
         """
-        c = 0
         if stop <= start:
-            for i in range(num):
-                i = max(i, 1)
-                x = 1 - ((stop - float(start)) / (i)) + (stop - 1)
-                buffer[c] = x
-                c += 1
+            self.fillReciprocal(buffer, num, stop, stop - start)
         else:
-            for i in range(num):
-                buffer[c] = stop
-                c += 1
-        return buffer
+            fillBuffer(buffer, stop, 0, num)
+
+    @micropython.viper
+    def fillReciprocal(self, buffer, num: int, stop: int, diff: int):
+        """Fill a sample buffer with stop - diff / max(i, 1) for each sample index i, used by the log and exponential
+        slew shapes
+
+        @param buffer Pointer to fill with samples
+        @param num    Number of samples required
+        @param stop   Target value in millivolts
+        @param diff   Difference between the target and starting values in millivolts
+        """
+        buf = ptr16(buffer)
+        if num > 0:
+            buf[0] = stop - diff
+        for i in range(1, num):
+            buf[i] = stop - diff // i
+
+    def fillCos(self, buffer, num, startOffset, amplitudeOffset, amplitude, freqHz):
+        """Fill a sample buffer with amplitudeOffset + amplitude * (1 + cos(n * theta)), used by the cosine slew shapes
+
+        theta is chosen so that freqHz cycles are completed in num samples and n runs from startOffset.
+        The phase and values are converted to fixed point here, then the samples are generated by fillCosKernel()
+
+        @param buffer           Pointer to fill with samples
+        @param num              The number of samples required
+        @param startOffset      The sample number the wave starts at
+        @param amplitudeOffset  The lowest value of the wave in millivolts
+        @param amplitude        Half of the peak to peak amplitude of the wave in millivolts
+        @param freqHz           The number of cycles to complete in num samples
+        """
+        cyclesPerSample = freqHz / max(1, num)
+        startCycles = startOffset * cyclesPerSample
+        self.fillCosKernel(
+            buffer,
+            num,
+            int((startCycles - int(startCycles)) * PHASE_CYCLE),
+            round(cyclesPerSample * PHASE_CYCLE),
+            round(amplitude + amplitudeOffset),
+            round(amplitude),
+        )
+
+    @micropython.viper
+    def fillCosKernel(self, buffer, num: int, phase: int, phaseInc: int, base: int, amplitude: int):
+        """Fill a sample buffer with base + amplitude * cos(phase), advancing the phase by phaseInc each sample
+
+        @param buffer     Pointer to fill with samples
+        @param num        The number of samples required
+        @param phase      The starting phase, where 2^30 is a full cycle
+        @param phaseInc   The phase to advance each sample
+        @param base       The value when cos(phase) is 0 in millivolts
+        @param amplitude  The amplitude in millivolts
+        """
+        buf = ptr16(buffer)
+        lut = ptr32(COS_LUT)
+        for i in range(num):
+            idx = phase >> PHASE_INDEX_SHIFT
+            c = lut[idx]
+            c += ((lut[idx + 1] - c) * ((phase >> PHASE_INTERP_SHIFT) & 0x7FFF)) >> 15
+            buf[i] = base + ((amplitude * c + COS_HALF) >> 15)
+            phase = (phase + phaseInc) & PHASE_MASK
 
     def smooth(self, start, stop, num, buffer):
         """Produces smooth curve using half a cosine wave
 
-        @param start  Starting value
-        @param stop   Target value
+        @param start  Starting value in millivolts
+        @param stop   Target value in millivolts
         @param num    The number of samples required
         @param buffer Pointer to fill with samples
-
-        @return  The edited buffer
         """
-        c = 0
-        freqHz = 0.5  # We want to complete half a cycle
-        amplitude = abs(
-            (stop - start) / 2
-        )  # amplitude is half of the diff between start and stop (this is peak to peak)
+        # amplitude is half of the diff between start and stop (this is peak to peak)
+        amplitude = abs((stop - start) / 2)
         if start <= stop:
             # Starting position is 90 degrees (cos) at 'start' volts
-            startOffset = num
-            amplitudeOffset = start
+            startOffset, amplitudeOffset = num, start
         else:
             # Starting position is 0 degrees (cos) at 'stop' volts
-            startOffset = 0
-            amplitudeOffset = stop
-        for i in range(num):
-            i += startOffset
-            val = amplitude + float(
-                amplitude * math.cos(2 * math.pi * freqHz * i / float(num))
-            )
-            buffer[c] = round(val + amplitudeOffset, 4)
-            c += 1
-        return buffer
+            startOffset, amplitudeOffset = 0, stop
+        # We want to complete half a cycle
+        self.fillCos(buffer, num, startOffset, amplitudeOffset, amplitude, 0.5)
 
     def expUpexpDown(self, start, stop, num, buffer):
         """Produces pointy exponential wave using a quarter cosine up and a quarter cosine down
 
-        @param start  Starting value
-        @param stop   Target value
+        @param start  Starting value in millivolts
+        @param stop   Target value in millivolts
         @param num    The number of samples required
         @param buffer Pointer to fill with samples
-
-        @return  The edited buffer
         """
-        c = 0
-        freqHz = 0.25  # We want to complete quarter of a cycle
-        amplitude = abs(
-            (stop - start)
-        )  # amplitude is half of the diff between start and stop (this is peak to peak)
+        amplitude = abs(stop - start)
         if start <= stop:
-            startOffset = num * 2
-            amplitudeOffset = start
-            for i in range(num):
-                i += startOffset
-                val = amplitude + float(
-                    amplitude * math.cos(2 * math.pi * freqHz * i / float(num))
-                )
-                buffer[c] = round(val + amplitudeOffset, 4)
-                c += 1
+            startOffset, amplitudeOffset = num * 2, start
         else:
-            startOffset = num
-            amplitudeOffset = stop
-            for i in range(num):
-                i += startOffset
-                val = amplitude + float(
-                    amplitude * math.cos(2 * math.pi * freqHz * i / float(num))
-                )
-                buffer[c] = round(val + amplitudeOffset, 4)
-                c += 1
-        return buffer
+            startOffset, amplitudeOffset = num, stop
+        # We want to complete quarter of a cycle
+        self.fillCos(buffer, num, startOffset, amplitudeOffset, amplitude, 0.25)
 
     def sharkTooth(self, start, stop, num, buffer):
         """Produces a sharktooth wave with an approximate log curve up and approximate
         exponential curve down
 
-        @param start  Starting value
-        @param stop   Target value
+        @param start  Starting value in millivolts
+        @param stop   Target value in millivolts
         @param num    The number of samples required
         @param buffer Pointer to fill with samples
-
-        @return  The edited buffer
         """
-        c = 0
-        freqHz = 0.25  # We want to complete quarter of a cycle
-        amplitude = abs(
-            (stop - start)
-        )  # amplitude is half of the diff between start and stop (this is peak to peak)
+        amplitude = abs(stop - start)
         if start <= stop:
-            startOffset = num * 3
-            amplitudeOffset = start - amplitude
-            for i in range(num):
-                i += startOffset
-                val = amplitude + float(
-                    amplitude * math.cos(2 * math.pi * freqHz * i / float(num))
-                )
-                buffer[c] = round(val + amplitudeOffset, 4)
-                c += 1
+            startOffset, amplitudeOffset = num * 3, start - amplitude
         else:
-            startOffset = num
-            amplitudeOffset = stop
-            for i in range(num):
-                i += startOffset
-                val = amplitude + float(
-                    amplitude * math.cos(2 * math.pi * freqHz * i / float(num))
-                )
-                buffer[c] = round(val + amplitudeOffset, 4)
-                c += 1
-        return buffer
+            startOffset, amplitudeOffset = num, stop
+        # We want to complete quarter of a cycle
+        self.fillCos(buffer, num, startOffset, amplitudeOffset, amplitude, 0.25)
 
     def sharkToothReverse(self, start, stop, num, buffer):
         """Produces a reverse sharktooth wave with an approximate exponential curve up and approximate
         log curve down
 
-        @param start  Starting value
-        @param stop   Target value
+        @param start  Starting value in millivolts
+        @param stop   Target value in millivolts
         @param num    The number of samples required
         @param buffer Pointer to fill with samples
-
-        @return  The edited buffer
         """
-        c = 0
-        freqHz = 0.25  # We want to complete quarter of a cycle
-        amplitude = abs(
-            (stop - start)
-        )  # amplitude is half of the diff between start and stop (this is peak to peak)
+        amplitude = abs(stop - start)
         if start <= stop:
-            startOffset = num * 2
-            amplitudeOffset = start
-            for i in range(num):
-                i += startOffset
-                val = amplitude + float(
-                    amplitude * math.cos(2 * math.pi * freqHz * i / float(num))
-                )
-                buffer[c] = round(val + amplitudeOffset, 4)
-                c += 1
+            startOffset, amplitudeOffset = num * 2, start
         else:
-            startOffset = 0
-            amplitudeOffset = 1 - (amplitude - stop + 1)
-            for i in range(num):
-                i += startOffset
-                val = amplitude + float(
-                    amplitude * math.cos(2 * math.pi * freqHz * i / float(num))
-                )
-                buffer[c] = round(val + amplitudeOffset, 4)
-                c += 1
-        return buffer
-
-    def slewGenerator(self, arr):
-        """Generator function that returns the next slew sample from the specified list
-
-        @param  The list of samples to choose from
-        """
-        for s in range(len(arr)):
-            yield arr[s]
+            startOffset, amplitudeOffset = 0, stop - amplitude
+        # We want to complete quarter of a cycle
+        self.fillCos(buffer, num, startOffset, amplitudeOffset, amplitude, 0.25)
 
 
 if __name__ == "__main__":
@@ -131,7 +131,7 @@ class DummyDisplay:
     def ellipse(self, x, y, xr, yr, colour=1, fill=False):
         pass
 
-    def blit(self, buffer, x, y):
+    def blit(self, buffer, x, y, key=-1, palette=None):
         pass
 
     def scroll(self, x, y):
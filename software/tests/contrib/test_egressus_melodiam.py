@@ -0,0 +1,180 @@
+import builtins
+import math
+import sys
+from array import array
+
+import pytest
+import utime
+
+
+@pytest.fixture
+def em(monkeypatch, tmp_path):
+    """Import the script with the MicroPython only names it uses mocked out
+
+    The viper pointer casts pass the buffer straight through, the const/native/viper passthroughs
+    are in tests/mocks/micropython.py
+    """
+    monkeypatch.setitem(sys.modules, "time", utime)
+    monkeypatch.setattr(builtins, "ptr16", lambda buffer: buffer, raising=False)
+    monkeypatch.setattr(builtins, "ptr32", lambda buffer: buffer, raising=False)
+    # Keep any saved state out of the working directory
+    monkeypatch.chdir(tmp_path)
+    import contrib.egressus_melodiam as em
+
+    return em
+
+
+@pytest.fixture
+def script(em):
+    return em.EgressusMelodiam()
+
+
+def new_buffer(em):
+    return array("h", bytes(2 * em.SLEW_BUFFER_SIZE_IN_SAMPLES))
+
+
+# Reference slew shapes, the original floating point formulas in millivolts
+
+
+def reference_step(lfo, start, stop, num):
+    if lfo:
+        return [start] * (num // 2) + [stop] * (num - num // 2)
+    return [stop] * num
+
+
+def reference_linear(lfo, start, stop, num):
+    diff = (stop - start) / max(1, num)
+    return [start + diff * i for i in range(num)]
+
+
+def reference_reciprocal(start, stop, num):
+    return [stop - (stop - start) / max(i, 1) for i in range(num)]
+
+
+def reference_log(lfo, start, stop, num):
+    if lfo:
+        return reference_reciprocal(start, stop, num // 2) + [stop] * (num - num // 2)
+    if stop >= start:
+        return reference_reciprocal(start, stop, num)
+    return [stop] * num
+
+
+def reference_exp(lfo, start, stop, num):
+    if stop <= start:
+        return reference_reciprocal(start, stop, num)
+    return [stop] * num
+
+
+def reference_cos(num, start_offset, amplitude_offset, amplitude, freq_hz):
+    return [
+        amplitude
+        + amplitude * math.cos(2 * math.pi * freq_hz * (i + start_offset) / num)
+        + amplitude_offset
+        for i in range(num)
+    ]
+
+
+def reference_smooth(lfo, start, stop, num):
+    amplitude = abs((stop - start) / 2)
+    if start <= stop:
+        return reference_cos(num, num, start, amplitude, 0.5)
+    return reference_cos(num, 0, stop, amplitude, 0.5)
+
+
+def reference_exp_up_exp_down(lfo, start, stop, num):
+    amplitude = abs(stop - start)
+    if start <= stop:
+        return reference_cos(num, num * 2, start, amplitude, 0.25)
+    return reference_cos(num, num, stop, amplitude, 0.25)
+
+
+def reference_shark_tooth(lfo, start, stop, num):
+    amplitude = abs(stop - start)
+    if start <= stop:
+        return reference_cos(num, num * 3, start - amplitude, amplitude, 0.25)
+    return reference_cos(num, num, stop, amplitude, 0.25)
+
+
+def reference_shark_tooth_reverse(lfo, start, stop, num):
+    amplitude = abs(stop - start)
+    if start <= stop:
+        return reference_cos(num, num * 2, start, amplitude, 0.25)
+    return reference_cos(num, 0, stop - amplitude, amplitude, 0.25)
+
+
+@pytest.mark.parametrize(
+    "slew_mode, reference, max_error",
+    [
+        (0, reference_step, 0),
+        (1, reference_linear, 1),
+        (2, reference_smooth, 1.5),
+        (3, reference_exp_up_exp_down, 1.5),
+        (4, reference_shark_tooth, 1.5),
+        (5, reference_shark_tooth_reverse, 1.5),
+        (6, reference_log, 1),
+        (7, reference_exp, 1),
+    ],
+)
+@pytest.mark.parametrize("pattern_length", [1, 8])
+@pytest.mark.parametrize(
+    "start, stop", [(0, 10000), (10000, 0), (1000, 5000), (5000, 1000), (2500, 2500)]
+)
+@pytest.mark.parametrize("num", [1, 2, 7, 32, 301])
+def test_slew_shapes(em, script, slew_mode, reference, max_error, pattern_length, start, stop, num):
+    """Each slew shape matches the original floating point formula, including its endpoints"""
+    script.patternLength = pattern_length
+    buffer = new_buffer(em)
+    script.slewShapes[slew_mode](start, stop, num, memoryview(buffer))
+    expected = reference(pattern_length == 1, start, stop, num)
+
+    errors = [abs(buffer[i] - expected[i]) for i in range(num)]
+    assert max(errors) <= max_error
+    # The samples run from the first value to the last value of the formula
+    assert abs(buffer[0] - expected[0]) <= max_error
+    assert abs(buffer[num - 1] - expected[num - 1]) <= max_error
+    # No samples are written past the end of the slew
+    assert not any(buffer[num:])
+
+
+def test_slew_cache(em, script):
+    """Cache hits output identical samples and the cache stays within its bounds"""
+    script.patternLength = 8
+
+    # A miss generates the slew into the output's own buffer
+    script.generateSlew(1, 1.0, 5.0, 100, 0)
+    assert script.slewBuffers[0] is script.slewBufferViews[0]
+    generated = list(script.slewBuffers[0][:100])
+
+    # A hit outputs the cached samples without generating them again
+    script.slewBufferViews[0][:100] = array("h", bytes(200))
+    script.generateSlew(1, 1.0, 5.0, 100, 0)
+    assert script.slewBuffers[0] is not script.slewBufferViews[0]
+    assert list(script.slewBuffers[0][:100]) == generated
+
+    # Fill the cache past both of its limits with slews of varying lengths
+    for n in range(4 * em.SLEW_CACHE_MAX_ENTRIES):
+        script.generateSlew(2, 0.0, 1.0 + n / 100, 1 + (n * 37) % 200, 1)
+        assert len(script.slewCache) <= em.SLEW_CACHE_MAX_ENTRIES
+        assert len(script.slewCacheKeys) == len(script.slewCache)
+        assert script.slewCacheSamples == sum(len(samples) for samples in script.slewCache.values())
+        assert script.slewCacheSamples <= em.SLEW_CACHE_MAX_SAMPLES
+
+
+def test_slew_cache_does_not_reuse_samples_being_output(em, script):
+    """A cached slew that an output is reading is never overwritten, even after it is evicted"""
+    script.patternLength = 8
+
+    # Output 0 reads a cached slew
+    script.generateSlew(1, 0.0, 8.0, 300, 0)
+    script.generateSlew(1, 0.0, 8.0, 300, 0)
+    reading = script.slewBuffers[0]
+    assert reading is not script.slewBufferViews[0]
+    expected = list(reading)
+
+    # Evict it with slews that fit in its array, while output 0 is still reading it
+    for n in range(2 * em.SLEW_CACHE_MAX_ENTRIES):
+        script.generateSlew(2, 1.0, 2.0 + n / 100, 200 + n, 1)
+
+    assert all(samples is not reading for samples in script.slewCache.values())
+    assert script.slewBuffers[0] is reading
+    assert list(reading) == expected